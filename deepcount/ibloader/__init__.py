@@ -0,0 +1,8 @@
+from ._writer import SnapshotWriter, ParquetSnapshotWriter
+from ._driver import (
+    SnapshotDriver,
+    SnapshotWrapper,
+    SnapshotApp,
+    run_basket,
+)
+from ._basket import FuturesBasket, MetalsBasket
@@ -0,0 +1,38 @@
+import argparse
+import logging
+from collections import OrderedDict
+
+from ._writer import SnapshotWriter, ParquetSnapshotWriter
+from ._driver import run_basket
+from ._basket import FuturesBasket, MetalsBasket
+
+BASKET_CHOICES = OrderedDict([
+    ("equities", FuturesBasket),
+    ("metals", MetalsBasket),
+])
+
+parser = argparse.ArgumentParser(description="""
+Collecting futures historical data
+""")
+
+parser.add_argument("-v", "--verbose", action="store_true")
+parser.add_argument("--host", default="127.0.0.1")
+parser.add_argument("--port", default=7497, type=int)
+parser.add_argument("--clientid", default=0, type=int)
+baskets = list(BASKET_CHOICES.keys(),)
+parser.add_argument("--basket", default=baskets[0], choices=baskets)
+parser.add_argument("--parquet", action="store_true",
+                    help="write daily Parquet files instead of CSV "
+                         "(requires pyarrow)")
+
+args = parser.parse_args()
+
+if args.verbose:
+    logging.basicConfig(level=logging.INFO)
+else:
+    logging.basicConfig(level=logging.WARNING)
+
+basket = BASKET_CHOICES[args.basket]()
+writer_cls = ParquetSnapshotWriter if args.parquet else SnapshotWriter
+run_basket(basket, args.host, args.port, args.clientid,
+           writer_cls=writer_cls)
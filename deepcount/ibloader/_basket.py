@@ -0,0 +1,116 @@
+import copy
+import functools
+import datetime
+from calendar import monthrange
+
+from ibapi.contract import Contract
+
+from ._driver import SnapshotDriver
+
+# futures month codes indexed by month - 1
+_MONTH_CODES = "FGHJKMNQUVXZ"
+
+# prebuilt futures contract cloned per request so only the per-symbol
+# fields are assigned at generation time
+_CONTRACT_TEMPLATE = Contract()
+_CONTRACT_TEMPLATE.secType = "FUT"
+_CONTRACT_TEMPLATE.currency = "USD"
+
+
+class FuturesBasket:
+
+    @staticmethod
+    def futures_contract(ticker: str, exchange: str):
+        contract = copy.copy(_CONTRACT_TEMPLATE)
+        contract.exchange = exchange
+        contract.localSymbol = ticker
+        return contract
+
+    @staticmethod
+    def local_symbol(base: str, expiration_date: datetime.datetime):
+        expiration_label = _MONTH_CODES[expiration_date.month - 1]
+        year_suffix = expiration_date.year % 10
+        ticker = f"{base}{expiration_label}{year_suffix}"
+        return ticker
+
+    @property
+    def symbols(self):
+        return ["ES", "NQ", "RTY"]
+
+    @property
+    def exchange(self):
+        return "GLOBEX"
+
+    @property
+    def roll_offset(self):
+        return 8
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def get_expiration_date(year, month):
+        """ third Friday in the month """
+        first_weekday = datetime.date(year, month, 1).weekday()
+        first_friday = 1 + (4 - first_weekday) % 7
+        return datetime.datetime(year=year, month=month,
+                                 day=first_friday + 14)
+
+    EXPIRATION_MONTHS = [3, 6, 9, 12]
+
+    def get_expiration_months(self, symbol: str):
+        return self.EXPIRATION_MONTHS
+
+    def next_expiration_date(self, symbol: str, today: datetime.datetime):
+        """ first expiration on or after today """
+        for year in (today.year, today.year + 1):
+            for month in self.get_expiration_months(symbol):
+                expiration_date = self.get_expiration_date(year, month)
+                if expiration_date >= today:
+                    return expiration_date
+
+    def generate_requests(self, today=None):
+        today = today or datetime.datetime.today()
+        for base in self.symbols:
+            expiration_date = self.next_expiration_date(base, today)
+            roll_date = (expiration_date
+                         - datetime.timedelta(days=self.roll_offset))
+            ticker = FuturesBasket.local_symbol(base, expiration_date)
+            contract = FuturesBasket.futures_contract(ticker, self.exchange)
+            end_date = min(roll_date, today)
+            yield SnapshotDriver.Request(contract, end_date)
+
+
+class MetalsBasket(FuturesBasket):
+    @property
+    def symbols(self):
+        return ["GC", "HG", "SI"]
+
+    @property
+    def exchange(self):
+        return "NYMEX"
+
+    @property
+    def roll_offset(self):
+        return 7
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def get_expiration_date(year, month):
+        _, last_day = monthrange(year, month)
+        bizdays = [d for d in range(last_day, 21, -1)
+                   if (1 <= datetime.datetime(year=year,
+                                              month=month,
+                                              day=d).weekday()
+                       <= 5)]
+        return datetime.datetime(year=year, month=month, day=bizdays[-3])
+
+    EXPIRATION_MONTHS = {
+        "GC": [2, 4, 6, 8, 10, 12],
+        "HG": [3, 5, 7, 9, 12],
+        "SI": [3, 5, 7, 9, 12],
+    }
+
+    def get_expiration_months(self, symbol: str):
+        try:
+            return self.EXPIRATION_MONTHS[symbol]
+        except KeyError:
+            raise NotImplementedError(symbol)
@@ -0,0 +1,196 @@
+import logging
+import datetime
+import threading
+from collections import deque
+
+from ibapi.common import BarData
+from ibapi.client import EClient
+from ibapi.wrapper import EWrapper
+from ibapi.contract import Contract
+
+from ._writer import SnapshotWriter
+
+logger = logging.getLogger(__name__)
+
+# (state, event) -> ordered rules of (guard, actions, next_state); the
+# first rule whose guard passes wins, a None guard always passes and a
+# None next_state keeps the current state. "*" matches any state. Built
+# once at import so every driver instance shares the same table.
+_SM_TABLE = {
+    ("initial", "nextValidId"): [
+        (None, ("send_req_historical",), "req_historical"),
+    ],
+    ("req_historical", "historicalDataEnd"): [
+        ("is_request_pending", ("send_req_historical",), None),
+        (None, ("cleanup", "disconnect"), "finalize"),
+    ],
+    ("*", "error"): [
+        ("is_fatal_error", ("log_error", "cleanup", "disconnect"),
+         "finalize"),
+        (None, ("log_error",), None),
+    ],
+    ("*", "stop"): [
+        (None, ("cleanup", "disconnect"), "finalize"),
+    ],
+}
+
+
+class SnapshotDriver():
+    REQ_HISTORICAL = 1
+
+    class Request:
+        def __init__(self, contract: Contract, endtime: datetime.datetime,
+                     duration="3 M", barsize="5 mins", after_hours=False):
+            self.contract = contract
+            self.endtime = endtime
+            # formatted once here so the callback path doesn't strftime
+            self.query_time = endtime.strftime("%Y%m%d %H:%M:%S")
+            self.duration = duration
+            self.barsize = barsize
+            self.after_hours = after_hours
+
+    _TABLE = _SM_TABLE
+
+    def __init__(self, app: EClient, requests : list,
+                 writer_cls=SnapshotWriter):
+        self.app = app
+        self.requests = deque(requests)
+        self.writer_cls = writer_cls
+        self.row_index = 0
+        self.current_writer = None
+        # writers stay open across requests so sequential requests for
+        # the same ticker keep appending to the same daily files; they
+        # are finalized together in cleanup
+        self._writers = {}
+        self.state = "initial"
+
+    def _dispatch(self, event, *args):
+        rules = (self._TABLE.get((self.state, event))
+                 or self._TABLE.get(("*", event)))
+        if not rules:
+            return
+        for guard, actions, next_state in rules:
+            if guard is None or getattr(self, guard)(*args):
+                for action in actions:
+                    getattr(self, action)(*args)
+                if next_state is not None:
+                    self.state = next_state
+                return
+
+    #--- Events ---
+    def error(self, *args):
+        self._dispatch("error", *args)
+
+    def stop(self, *args):
+        self._dispatch("stop", *args)
+
+    def nextValidId(self, *args):
+        self._dispatch("nextValidId", *args)
+
+    def historicalDataEnd(self, *args):
+        self._dispatch("historicalDataEnd", *args)
+
+    def log_error(self, req_id, error_code, error_str, *_, **__):
+        """ Logs a received error """
+        # lazy %s formatting so filtered records never build the string
+        logger.error("%s (req_id:%s, error_code:%s)",
+                     error_str, req_id, error_code)
+
+    def disconnect(self, *_, **__):
+        """ Requests the client to disconnect """
+        self.app.disconnect()
+
+    #--- Conditions ---
+    def is_fatal_error(self, _, error_code, *__, **___):
+        """ True if the error is fatal and system should stop, else False """
+        # 2000-9999 are informational; 10167 is delayed market data
+        return not (2000 <= error_code < 10000 or error_code == 10167)
+
+    def is_request_pending(self, *_):
+        return bool(self.requests)
+
+    def send_req_historical(self, *_, **__):
+        request = self.requests.popleft()
+        local_symbol = request.contract.localSymbol
+        writer = self._writers.get(local_symbol)
+        if writer is None:
+            writer = self.writer_cls(local_symbol)
+            self._writers[local_symbol] = writer
+        self.current_writer = writer
+
+        self.app.reqHistoricalData(self.REQ_HISTORICAL,
+                                   request.contract,
+                                   request.query_time,
+                                   request.duration,
+                                   request.barsize,
+                                   "TRADES",
+                                   0 if request.after_hours else 1,
+                                   1,
+                                   False, # keep up to date
+                                   [])
+
+    def save_bar_data(self, req_id: int, bar: BarData):
+        self.current_writer.save_bar(bar)
+
+    # historicalData fires once per bar and always self-loops in
+    # req_historical, so it skips the dispatch table and goes straight
+    # to the handler
+    historicalData = save_bar_data
+
+    def cleanup(self, *args):
+        for writer in self._writers.values():
+            writer.finalize()
+        self._writers.clear()
+        self.current_writer = None
+
+
+class SnapshotWrapper(EWrapper):
+
+    # machine triggers on the driver that double as EWrapper callbacks
+    DRIVER_EVENTS = [
+        "error",
+        "nextValidId",
+        "historicalData",
+        "historicalDataEnd",
+    ]
+
+    def __init__(self, driver : SnapshotDriver):
+        EWrapper.__init__(self)
+        self.driver = driver
+        # bind the driver triggers as plain instance attributes so hot
+        # callbacks resolve through a normal __dict__ lookup instead of
+        # a Python-level __getattribute__ dispatcher
+        for name in self.DRIVER_EVENTS:
+            setattr(self, name, getattr(driver, name))
+
+
+class SnapshotApp(EClient):
+    def __init__(self, requests: list, writer_cls=SnapshotWriter):
+        self.requests = requests
+        self.driver = SnapshotDriver(self, self.requests,
+                                     writer_cls=writer_cls)
+        wrapper = SnapshotWrapper(self.driver)
+        EClient.__init__(self, wrapper=wrapper)
+
+    def keyboardInterrupt(self):
+        self.driver.stop()
+
+
+def run_basket(basket, host: str, port: int, client_id: int,
+               writer_cls=SnapshotWriter):
+    """ Fans the basket's requests out across one connection per symbol.
+
+    IB allows several simultaneous clients with distinct client ids, and
+    the requests are independent per symbol, so each shard gets its own
+    SnapshotApp (client + driver + wrapper) on its own thread.
+    """
+    apps = [SnapshotApp([request], writer_cls=writer_cls)
+            for request in basket.generate_requests()]
+    threads = []
+    for offset, app in enumerate(apps):
+        app.connect(host, port, client_id + offset)
+        thread = threading.Thread(target=app.run)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
@@ -0,0 +1,120 @@
+import datetime
+import os
+
+from ibapi.common import BarData
+
+
+def _fast_date(date_str):
+    """ "YYYYMMDD" -> datetime.date, without strptime """
+    return datetime.date(int(date_str[0:4]),
+                         int(date_str[4:6]),
+                         int(date_str[6:8]))
+
+
+class SnapshotWriter:
+
+    BAR_COLUMNS = [
+        "date", "open", "high", "low", "close", "volume",
+        # "barCount", "average",
+    ]
+
+    # row formatter specialized to BAR_COLUMNS at class-definition time:
+    # a single f-string evaluation per bar, no field loop or join. Rows
+    # are pure ASCII, so encode here and write bytes to skip the
+    # TextIOWrapper layer.
+    _format_bar = staticmethod(eval(
+        "lambda bar: f'%s\\n'.encode('ascii')"
+        % ",".join("{bar.%s}" % column for column in BAR_COLUMNS)))
+
+    def __init__(self, ticker : str, base_dir = "snapshots"):
+        self.ticker = ticker
+        self.base_dir = base_dir
+        os.makedirs(base_dir, exist_ok=True)
+        self.cur_date = None
+        self.cur_file = None
+        self._buf = []
+        self._buf_limit = 1000
+
+    def _flush(self):
+        if self._buf:
+            self.cur_file.writelines(self._buf)
+            self._buf.clear()
+
+    def save_bar(self, bar : BarData):
+        # bar.date is always "YYYYMMDD HH:MM:SS", so the day is just the
+        # first 8 characters; comparing strings avoids a strptime per bar
+        date_str = bar.date[:8]
+
+        if self.cur_date != date_str:
+            if self.cur_file:
+                self._flush()
+                self.cur_file.close()
+            self.cur_date = date_str
+            d = _fast_date(date_str)
+            filename = "{date}_{ticker}.csv".format(date=d, ticker=self.ticker)
+            filepath = os.path.join(self.base_dir, filename)
+            self.cur_file = open(filepath, "wb", buffering=1<<20)
+            self.cur_file.write(
+                (",".join(self.BAR_COLUMNS) + "\n").encode("ascii"))
+
+        self._buf.append(self._format_bar(bar))
+        if len(self._buf) >= self._buf_limit:
+            self._flush()
+
+    def finalize(self):
+        self.cur_date = None
+        if self.cur_file:
+            self._flush()
+            self.cur_file.close()
+            self.cur_file = None
+
+
+class ParquetSnapshotWriter:
+    """ SnapshotWriter variant that stages bars column-wise and writes
+    one compressed Parquet file per day. Skips the per-field str()
+    formatting of the CSV path and produces much smaller files, at the
+    cost of requiring pyarrow. """
+
+    BAR_COLUMNS = SnapshotWriter.BAR_COLUMNS
+
+    def __init__(self, ticker : str, base_dir = "snapshots"):
+        # optional dependency; only imported when this writer is chosen
+        import pyarrow
+        import pyarrow.parquet
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.ticker = ticker
+        self.base_dir = base_dir
+        os.makedirs(base_dir, exist_ok=True)
+        self.cur_date = None
+        self._columns = {column: [] for column in self.BAR_COLUMNS}
+
+    def _write_day(self):
+        columns = self._columns
+        if not columns["date"]:
+            return
+        d = _fast_date(self.cur_date)
+        filename = "{date}_{ticker}.parquet".format(date=d,
+                                                    ticker=self.ticker)
+        filepath = os.path.join(self.base_dir, filename)
+        table = self._pa.table(columns)
+        self._pq.write_table(table, filepath, compression="zstd")
+        self._columns = {column: [] for column in self.BAR_COLUMNS}
+
+    def save_bar(self, bar : BarData):
+        date_str = bar.date[:8]
+        if self.cur_date != date_str:
+            self._write_day()
+            self.cur_date = date_str
+
+        columns = self._columns
+        columns["date"].append(bar.date)
+        columns["open"].append(bar.open)
+        columns["high"].append(bar.high)
+        columns["low"].append(bar.low)
+        columns["close"].append(bar.close)
+        columns["volume"].append(bar.volume)
+
+    def finalize(self):
+        self._write_day()
+        self.cur_date = None